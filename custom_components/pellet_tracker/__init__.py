@@ -1,18 +1,109 @@
 """The Pellet Tracker integration."""
 from __future__ import annotations
 
+import asyncio
+from datetime import datetime
+import logging
+
+import voluptuous as vol
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_NAME, EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.core import Event, HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    DATA_FLEET,
+    DATA_SIMULATOR,
+    CONF_FLEET_ENGINE,
+    CONF_TANK_SIZE,
+    CONF_POWER_LEVELS,
+    CONF_MAX_RATE,
+    DEFAULT_SIMULATION_DAYS,
+    DEFAULT_FLEET_ENGINE,
+    SERVICE_SIMULATE,
+    SERVICE_QUERY_CONSUMPTION,
+    ATTR_ENTRY_ID,
+    ATTR_CANDIDATES,
+    ATTR_DAYS,
+    ATTR_RANGES,
+    ATTR_START,
+    ATTR_END,
+)
+from .simulator import SimulationPool
+from .tracker import PelletTracker, UPDATE_INTERVAL
+
+try:
+    from .fleet import FleetEngine
+except ImportError:  # NumPy is not installed
+    FleetEngine = None
 
-from .const import DOMAIN
-from .tracker import PelletTracker
+_LOGGER = logging.getLogger(__name__)
 
 # List the platforms that you want to support.
 PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BUTTON]
 
+def _fleet_engine_available(value: bool) -> bool:
+    """Reject the fleet engine option when NumPy is not installed."""
+    if value and FleetEngine is None:
+        raise vol.Invalid(f"{CONF_FLEET_ENGINE} requires NumPy, which is not installed")
+    return value
+
+
+CONFIG_SCHEMA = vol.Schema(
+    {
+        vol.Optional(DOMAIN): vol.Schema(
+            {
+                vol.Optional(CONF_FLEET_ENGINE, default=DEFAULT_FLEET_ENGINE): vol.All(
+                    cv.boolean, _fleet_engine_available
+                ),
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+CANDIDATE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_NAME): cv.string,
+        vol.Optional(CONF_TANK_SIZE): vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False)),
+        vol.Optional(CONF_MAX_RATE): vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False)),
+        vol.Optional(CONF_POWER_LEVELS): vol.All(cv.ensure_list_csv, [cv.string]),
+    }
+)
+
+SIMULATE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTRY_ID): cv.string,
+        vol.Required(ATTR_CANDIDATES): vol.All(cv.ensure_list, [CANDIDATE_SCHEMA]),
+        vol.Optional(ATTR_DAYS, default=DEFAULT_SIMULATION_DAYS): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=365)
+        ),
+    }
+)
+
+RANGE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_START): cv.datetime,
+        vol.Required(ATTR_END): cv.datetime,
+    }
+)
+
+QUERY_CONSUMPTION_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTRY_ID): cv.string,
+        vol.Required(ATTR_RANGES): vol.All(cv.ensure_list, [RANGE_SCHEMA]),
+    }
+)
+
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up the Pellet Tracker component."""
+    if config.get(DOMAIN, {}).get(CONF_FLEET_ENGINE, DEFAULT_FLEET_ENGINE):
+        _async_setup_fleet(hass)
     
     async def handle_set_level(call):
         entry_id = call.data.get("entry_id")
@@ -24,8 +115,82 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
             await tracker.async_set_level(level_pct, calibrate)
             
     hass.services.async_register(DOMAIN, "set_level", handle_set_level)
+
+    # Simulation worker processes are started on first use and reused
+    hass.data[DATA_SIMULATOR] = SimulationPool()
+
+    async def async_stop_simulator(event: Event) -> None:
+        await hass.async_add_executor_job(hass.data[DATA_SIMULATOR].shutdown)
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_stop_simulator)
+
+    async def handle_simulate(call: ServiceCall) -> ServiceResponse:
+        entry_id = call.data[ATTR_ENTRY_ID]
+
+        if DOMAIN not in hass.data or entry_id not in hass.data[DOMAIN]:
+            raise ServiceValidationError(f"Pellet Tracker entry {entry_id} is not loaded")
+
+        tracker = hass.data[DOMAIN][entry_id]
+        return await tracker.async_simulate(
+            hass.data[DATA_SIMULATOR], call.data[ATTR_CANDIDATES], call.data[ATTR_DAYS]
+        )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SIMULATE,
+        handle_simulate,
+        schema=SIMULATE_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def handle_query_consumption(call: ServiceCall) -> ServiceResponse:
+        entry_id = call.data[ATTR_ENTRY_ID]
+
+        if DOMAIN not in hass.data or entry_id not in hass.data[DOMAIN]:
+            raise ServiceValidationError(f"Pellet Tracker entry {entry_id} is not loaded")
+
+        # Naive datetimes are interpreted in the configured time zone
+        ranges = [
+            (dt_util.as_utc(time_range[ATTR_START]), dt_util.as_utc(time_range[ATTR_END]))
+            for time_range in call.data[ATTR_RANGES]
+        ]
+        for start, end in ranges:
+            if end < start:
+                raise ServiceValidationError(f"Range end {end} is before start {start}")
+
+        tracker = hass.data[DOMAIN][entry_id]
+        return {"ranges": tracker.query_consumption(ranges)}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUERY_CONSUMPTION,
+        handle_query_consumption,
+        schema=QUERY_CONSUMPTION_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
     return True
 
+def _async_setup_fleet(hass: HomeAssistant) -> None:
+    """Create the fleet engine and the single timer settling all trackers."""
+    fleet = hass.data[DATA_FLEET] = FleetEngine()
+
+    async def async_fleet_tick(now: datetime) -> None:
+        # Only trackers whose shown level changed or whose save is due are called
+        notify, save = fleet.tick(dt_util.utcnow().timestamp())
+        due = set(save.tolist())
+        for slot in notify.tolist():
+            fleet.trackers[slot].async_fleet_updated(slot in due)
+
+    async_track_time_interval(hass, async_fleet_tick, UPDATE_INTERVAL)
+
+    async def async_stop_fleet(event: Event) -> None:
+        # Persist consumption accumulated since the last coalesced save
+        await asyncio.gather(
+            *(tracker.async_flush() for tracker in fleet.trackers if tracker is not None)
+        )
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_stop_fleet)
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Pellet Tracker from a config entry."""
     hass.data.setdefault(DOMAIN, {})
@@ -33,7 +198,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Merge data and options
     config = {**entry.data, **entry.options}
     
-    tracker = PelletTracker(hass, config, entry.entry_id, entry.title)
+    tracker = PelletTracker(hass, config, entry.entry_id, entry.title, hass.data.get(DATA_FLEET))
     await tracker.async_initialize()
     
     hass.data[DOMAIN][entry.entry_id] = tracker
@@ -54,5 +219,10 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         tracker = hass.data[DOMAIN].pop(entry.entry_id)
         tracker.close()
+        await tracker.async_flush()
+
+        if not hass.data[DOMAIN]:
+            # Release the simulation workers with the last entry
+            await hass.async_add_executor_job(hass.data[DATA_SIMULATOR].shutdown)
 
     return unload_ok
@@ -21,8 +21,10 @@ from .const import (
     CONF_ACTIVE_STATUSES,
     CONF_POWER_LEVELS,
     CONF_MAX_RATE,
+    CONF_JOURNAL,
     DEFAULT_TANK_SIZE,
     DEFAULT_MAX_RATE,
+    DEFAULT_JOURNAL,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -101,6 +103,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     CONF_POWER_LEVELS, default="1, 2, 3, 4, 5"
                 ): str,
                 vol.Required(CONF_MAX_RATE, default=DEFAULT_MAX_RATE): vol.Coerce(float),
+                vol.Optional(CONF_JOURNAL, default=DEFAULT_JOURNAL): bool,
             })
         else:
             # Fallback to text input
@@ -113,6 +116,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     CONF_POWER_LEVELS, default="1, 2, 3, 4, 5"
                 ): str,
                 vol.Required(CONF_MAX_RATE, default=DEFAULT_MAX_RATE): vol.Coerce(float),
+                vol.Optional(CONF_JOURNAL, default=DEFAULT_JOURNAL): bool,
             })
 
         return self.async_show_form(
@@ -181,6 +185,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     CONF_POWER_LEVELS, default=current_power_levels
                 ): str,
                 vol.Required(CONF_MAX_RATE, default=config.get(CONF_MAX_RATE, DEFAULT_MAX_RATE)): vol.Coerce(float),
+                vol.Optional(CONF_JOURNAL, default=config.get(CONF_JOURNAL, DEFAULT_JOURNAL)): bool,
             })
         else:
             if isinstance(current_statuses, list):
@@ -195,6 +200,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     CONF_POWER_LEVELS, default=current_power_levels
                 ): str,
                 vol.Required(CONF_MAX_RATE, default=config.get(CONF_MAX_RATE, DEFAULT_MAX_RATE)): vol.Coerce(float),
+                vol.Optional(CONF_JOURNAL, default=config.get(CONF_JOURNAL, DEFAULT_JOURNAL)): bool,
             })
 
         return self.async_show_form(
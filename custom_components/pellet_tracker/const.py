@@ -1,6 +1,8 @@
 """Constants for the Pellet Tracker integration."""
 
 DOMAIN = "pellet_tracker"
+DATA_FLEET = f"{DOMAIN}_fleet"
+DATA_SIMULATOR = f"{DOMAIN}_simulator"
 
 # Configuration Constants
 CONF_STATUS_ENTITY = "status_entity"
@@ -9,6 +11,8 @@ CONF_TANK_SIZE = "tank_size"
 CONF_ACTIVE_STATUSES = "active_statuses"
 CONF_POWER_LEVELS = "power_levels"
 CONF_MAX_RATE = "max_rate"
+CONF_JOURNAL = "journal"
+CONF_FLEET_ENGINE = "fleet_engine"  # YAML only, applies to all entries
 
 # Defaults
 DEFAULT_TANK_SIZE = 15.0  # kg
@@ -16,3 +20,17 @@ DEFAULT_ACTIVE_STATUSES = ["WORK", "START"]
 DEFAULT_MAX_RATE = 1.8  # kg/h
 DEFAULT_ALPHA = 0.15  # Learning rate for EWMA
 DEFAULT_MIN_RATE_FACTOR = 0.05  # Minimum rate as fraction of max rate (5%)
+DEFAULT_JOURNAL = False  # Save a full snapshot on every change
+DEFAULT_FLEET_ENGINE = False  # Per-stove tracking, best for small installs
+DEFAULT_POWER_LEVELS = ["1", "2", "3", "4", "5"]
+DEFAULT_SIMULATION_DAYS = 30  # Days of history replayed by the simulate service
+
+# Services
+SERVICE_SIMULATE = "simulate"
+ATTR_ENTRY_ID = "entry_id"
+ATTR_CANDIDATES = "candidates"
+ATTR_DAYS = "days"
+SERVICE_QUERY_CONSUMPTION = "query_consumption"
+ATTR_RANGES = "ranges"
+ATTR_START = "start"
+ATTR_END = "end"
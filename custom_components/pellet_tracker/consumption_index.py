@@ -0,0 +1,178 @@
+"""Cumulative consumption index for Pellet Tracker.
+
+Keeps monotonic timestamp and cumulative-gram arrays (total and per power
+level) so the consumption between any two instants can be answered in
+O(log n) by binary search and linear interpolation. The index only ever
+grows: refills and manual level changes do not affect it.
+
+Between two tracker updates consumption is assumed to be uniform, so the
+cumulative curve is piecewise linear. Consecutive segments with the same
+slope are merged, which keeps one point per rate change instead of one point
+per update.
+"""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+
+# Relative tolerance used to decide whether two segments have the same slope
+SLOPE_TOLERANCE = 1e-6
+
+# Persistence quantization: timestamps in milliseconds, grams in centigrams
+_TIME_SCALE = 1000
+_GRAMS_SCALE = 100
+
+
+def _delta_encode(values: array, scale: int) -> list[int]:
+    """Quantize values and encode them as first differences."""
+    encoded = []
+    previous = 0
+    for value in values:
+        quantized = round(value * scale)
+        encoded.append(quantized - previous)
+        previous = quantized
+    return encoded
+
+
+def _delta_decode(encoded: list[int], scale: int) -> array:
+    """Decode first differences back to values."""
+    values = array("d")
+    quantized = 0
+    for delta in encoded:
+        quantized += delta
+        values.append(quantized / scale)
+    return values
+
+
+class ConsumptionIndex:
+    """Time-indexed cumulative pellet consumption."""
+
+    def __init__(self) -> None:
+        self.timestamps = array("d")
+        self.cumulative = array("d")
+        self.cumulative_by_level: dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def _append_point(self, timestamp: float, consumed: dict[str, float]) -> None:
+        """Append a point adding the given per-level consumption to the last one."""
+        total = self.cumulative[-1] if self.cumulative else 0.0
+        self.timestamps.append(timestamp)
+        self.cumulative.append(total + sum(consumed.values()))
+        for level, values in self.cumulative_by_level.items():
+            values.append((values[-1] if values else 0.0) + consumed.get(level, 0.0))
+
+    def _is_collinear(self, start_ts: float, end_ts: float, level: str, consumption_g: float) -> bool:
+        """Return True if the new segment extends the last one with the same slope."""
+        if len(self.timestamps) < 2 or self.timestamps[-1] != start_ts:
+            return False
+
+        previous_total = self.cumulative[-1] - self.cumulative[-2]
+        values = self.cumulative_by_level[level]
+        previous_level = values[-1] - values[-2]
+        if abs(previous_total - previous_level) > SLOPE_TOLERANCE * previous_total:
+            # The last segment also consumed at other levels
+            return False
+
+        previous_slope = previous_level / (self.timestamps[-1] - self.timestamps[-2])
+        slope = consumption_g / (end_ts - start_ts)
+        return abs(previous_slope - slope) <= SLOPE_TOLERANCE * max(previous_slope, slope)
+
+    def record(self, start_ts: float, end_ts: float, level: str, consumption_g: float) -> None:
+        """Record consumption spread uniformly over [start_ts, end_ts]."""
+        if consumption_g <= 0:
+            return
+
+        if self.timestamps:
+            # Keep timestamps monotonic, e.g. if the clock went backwards
+            start_ts = max(start_ts, self.timestamps[-1])
+            end_ts = max(end_ts, start_ts)
+        elif end_ts <= start_ts:
+            return
+
+        if level not in self.cumulative_by_level:
+            # Backfill a new level with zeros so all arrays stay aligned
+            self.cumulative_by_level[level] = array("d", [0.0] * len(self.timestamps))
+
+        if end_ts == start_ts:
+            # Zero-length segment: add to the last point
+            self.cumulative[-1] += consumption_g
+            self.cumulative_by_level[level][-1] += consumption_g
+            return
+
+        if self._is_collinear(start_ts, end_ts, level, consumption_g):
+            # Move the last point forward instead of adding a new one
+            self.timestamps[-1] = end_ts
+            self.cumulative[-1] += consumption_g
+            self.cumulative_by_level[level][-1] += consumption_g
+            return
+
+        if not self.timestamps or self.timestamps[-1] < start_ts:
+            # Flat segment: nothing was consumed since the last point
+            self._append_point(start_ts, {})
+
+        self._append_point(end_ts, {level: consumption_g})
+
+    @staticmethod
+    def _value_at(timestamps: array, values: array, timestamp: float) -> float:
+        """Interpolate a cumulative value at the given timestamp."""
+        if not timestamps or timestamp <= timestamps[0]:
+            return 0.0
+        if timestamp >= timestamps[-1]:
+            return values[-1]
+
+        index = bisect_right(timestamps, timestamp)
+        t0, t1 = timestamps[index - 1], timestamps[index]
+        v0, v1 = values[index - 1], values[index]
+        return v0 + (v1 - v0) * (timestamp - t0) / (t1 - t0)
+
+    def cumulative_at(self, timestamp: float, level: str | None = None) -> float:
+        """Return the cumulative consumption (g) at the given timestamp."""
+        if level is None:
+            return self._value_at(self.timestamps, self.cumulative, timestamp)
+        values = self.cumulative_by_level.get(level)
+        if values is None:
+            return 0.0
+        return self._value_at(self.timestamps, values, timestamp)
+
+    def consumption_between(
+        self, start_ts: float, end_ts: float, level: str | None = None
+    ) -> float:
+        """Return the consumption (g) between two timestamps."""
+        if end_ts <= start_ts:
+            return 0.0
+        return self.cumulative_at(end_ts, level) - self.cumulative_at(start_ts, level)
+
+    def as_dict(self) -> dict:
+        """Return a compact, JSON serializable representation."""
+        return {
+            "t": _delta_encode(self.timestamps, _TIME_SCALE),
+            "g": _delta_encode(self.cumulative, _GRAMS_SCALE),
+            "levels": {
+                level: _delta_encode(values, _GRAMS_SCALE)
+                for level, values in self.cumulative_by_level.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict | None) -> ConsumptionIndex:
+        """Restore an index from its compact representation."""
+        index = cls()
+        if not data:
+            return index
+
+        index.timestamps = _delta_decode(data.get("t", []), _TIME_SCALE)
+        index.cumulative = _delta_decode(data.get("g", []), _GRAMS_SCALE)
+        index.cumulative_by_level = {
+            str(level): _delta_decode(values, _GRAMS_SCALE)
+            for level, values in data.get("levels", {}).items()
+        }
+
+        # Discard inconsistent data rather than answering queries wrongly
+        size = len(index.timestamps)
+        if len(index.cumulative) != size or any(
+            len(values) != size for values in index.cumulative_by_level.values()
+        ):
+            return cls()
+        return index
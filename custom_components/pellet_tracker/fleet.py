@@ -0,0 +1,199 @@
+"""Vectorized fleet engine for Pellet Tracker.
+
+Optional engine for installs with many stoves. Instead of one timer per
+tracker doing a state lookup, power normalization and rate math every tick,
+the current level, session consumption, active flag, effective rate and
+last-settled time of every tracker live in contiguous NumPy arrays. A single
+timer settles all trackers with one vectorized operation per tick.
+
+Per-tracker bookkeeping (consumption per level, consumption index, journal)
+is not done on every tick. Consumption is accumulated per slot as a pending
+segment at the current rate, and the engine only reports the slots whose
+displayed percentage changed or whose coalesced save is due. Trackers take
+the pending segment when they persist or change rate.
+
+This module does not import Home Assistant. Trackers attached to the engine
+act as thin views over their array slot.
+"""
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+INITIAL_CAPACITY = 64
+
+# Accumulated consumption is persisted at most this long after it started (seconds)
+FLEET_SAVE_DELAY = 300
+
+_ARRAYS = {
+    "level_g": float,
+    "tank_g": float,
+    "session_g": float,
+    "rate_g_h": float,
+    "active": bool,
+    "last_settled": float,
+    # Consumption not yet recorded by the tracker, since segment_start
+    "pending_g": float,
+    "segment_start": float,
+    # Percentage last reported to the tracker's entities
+    "shown_pct": np.int64,
+    # Consumption since the tracker last persisted, to save by save_due
+    "dirty": bool,
+    "save_due": float,
+}
+
+
+def level_pct(level_g: np.ndarray, tank_g: np.ndarray) -> np.ndarray:
+    """Return the integer percentage shown by the level sensor."""
+    pct = np.divide(
+        level_g * 100, tank_g, out=np.zeros(len(level_g)), where=tank_g > 0
+    )
+    return np.clip(pct, 0, 100).astype(np.int64)
+
+
+class FleetEngine:
+    """Settle the consumption of all attached trackers at once."""
+
+    def __init__(self, save_delay: float = FLEET_SAVE_DELAY) -> None:
+        self.save_delay = save_delay
+        # Owner (tracker) of each slot, None for free slots
+        self.trackers: list[Any] = []
+        self._free_slots: list[int] = []
+
+        for name, dtype in _ARRAYS.items():
+            setattr(self, name, np.zeros(INITIAL_CAPACITY, dtype=dtype))
+
+    def __len__(self) -> int:
+        return len(self.trackers) - len(self._free_slots)
+
+    def _grow(self) -> None:
+        """Double the capacity of all arrays."""
+        capacity = len(self.level_g) * 2
+        for name in _ARRAYS:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+
+    def register(
+        self, tracker: Any, level_g: float, session_g: float, tank_g: float, now_ts: float
+    ) -> int:
+        """Allocate a slot for a tracker with its current state."""
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self.trackers[slot] = tracker
+        else:
+            slot = len(self.trackers)
+            if slot >= len(self.level_g):
+                self._grow()
+            self.trackers.append(tracker)
+
+        for name in _ARRAYS:
+            getattr(self, name)[slot] = 0
+        self.level_g[slot] = level_g
+        self.session_g[slot] = session_g
+        self.tank_g[slot] = tank_g
+        self.last_settled[slot] = now_ts
+        self.shown_pct[slot] = level_pct(
+            self.level_g[slot : slot + 1], self.tank_g[slot : slot + 1]
+        )[0]
+        # Inactive until the tracker sets its rate from the current stove state
+        return slot
+
+    def unregister(self, slot: int) -> None:
+        """Release a slot."""
+        self.trackers[slot] = None
+        for name in _ARRAYS:
+            getattr(self, name)[slot] = 0
+        self._free_slots.append(slot)
+
+    def set_rate(self, slot: int, active: bool, rate_g_h: float) -> None:
+        """Set whether a tracker is consuming and its effective rate (g/h).
+
+        Settle the slot and take its pending consumption first, so the
+        pending segment stays at a single rate.
+        """
+        self.active[slot] = active
+        self.rate_g_h[slot] = rate_g_h
+
+    def _accumulate(
+        self, index: slice | int, consumption: np.ndarray | float, now_ts: float
+    ) -> None:
+        """Start pending segments and coalesced saves where consumption begins."""
+        consumed = consumption > 0
+        starts_segment = consumed & (self.pending_g[index] == 0)
+        starts_save = consumed & ~self.dirty[index]
+        self.segment_start[index] = np.where(
+            starts_segment, self.last_settled[index], self.segment_start[index]
+        )
+        self.save_due[index] = np.where(
+            starts_save, now_ts + self.save_delay, self.save_due[index]
+        )
+        self.dirty[index] |= consumed
+        self.pending_g[index] += consumption
+
+    def settle(self, now_ts: float) -> np.ndarray:
+        """Apply consumption since the last settle to every slot.
+
+        Returns the consumption (g) of each slot.
+        """
+        size = len(self.trackers)
+        level = self.level_g[:size]
+        last_settled = self.last_settled[:size]
+
+        elapsed_hours = np.maximum(now_ts - last_settled, 0.0) / 3600.0
+        consumption = np.where(self.active[:size], self.rate_g_h[:size] * elapsed_hours, 0.0)
+
+        self._accumulate(slice(0, size), consumption, now_ts)
+        level -= consumption
+        # Clamp to 0
+        np.maximum(level, 0.0, out=level)
+        self.session_g[:size] += consumption
+        np.maximum(last_settled, now_ts, out=last_settled)
+
+        return consumption
+
+    def settle_slot(self, slot: int, now_ts: float) -> float:
+        """Apply consumption since the last settle to a single slot.
+
+        Returns the consumption (g).
+        """
+        start_ts = float(self.last_settled[slot])
+        consumption = 0.0
+        if self.active[slot] and now_ts > start_ts:
+            consumption = float(self.rate_g_h[slot]) * (now_ts - start_ts) / 3600.0
+            self._accumulate(slot, consumption, now_ts)
+            self.level_g[slot] = max(float(self.level_g[slot]) - consumption, 0.0)
+            self.session_g[slot] += consumption
+        self.last_settled[slot] = max(now_ts, start_ts)
+        return consumption
+
+    def take_pending(self, slot: int) -> tuple[float, float, float]:
+        """Return and reset the pending consumption of a slot.
+
+        Returns the segment start and end times and the consumption (g).
+        """
+        consumption = float(self.pending_g[slot])
+        self.pending_g[slot] = 0.0
+        return float(self.segment_start[slot]), float(self.last_settled[slot]), consumption
+
+    def mark_saved(self, slot: int) -> None:
+        """Record that a tracker persisted everything it took."""
+        self.dirty[slot] = False
+
+    def tick(self, now_ts: float) -> tuple[np.ndarray, np.ndarray]:
+        """Settle all slots.
+
+        Returns the slots to notify (displayed percentage changed or save
+        due) and the slots whose coalesced save is due.
+        """
+        self.settle(now_ts)
+
+        size = len(self.trackers)
+        pct = level_pct(self.level_g[:size], self.tank_g[:size])
+        changed = pct != self.shown_pct[:size]
+        self.shown_pct[:size] = pct
+
+        due = self.dirty[:size] & (self.save_due[:size] <= now_ts)
+        return np.flatnonzero(changed | due), np.flatnonzero(due)
@@ -0,0 +1,110 @@
+"""Append-only journal for Pellet Tracker state changes.
+
+Each record is a compact JSON array on its own line, starting with a sequence
+number and a record type. All methods do blocking file I/O and must be run in
+an executor.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+from collections.abc import Callable
+
+_LOGGER = logging.getLogger(__name__)
+
+# Record types
+RECORD_CONSUMPTION = "c"  # [seq, "c", start_ts, end_ts, level, grams]
+RECORD_CALIBRATION = "k"  # [seq, "k", correction_factors]
+RECORD_REFILL = "r"  # [seq, "r"]
+RECORD_SET_LEVEL = "s"  # [seq, "s", level_g]
+RECORD_TYPES = (RECORD_CONSUMPTION, RECORD_CALIBRATION, RECORD_REFILL, RECORD_SET_LEVEL)
+
+
+def replay(
+    records: list[list], after_seq: int, apply: Callable[[int, str, list], None]
+) -> int:
+    """Call apply(seq, kind, payload) for each record newer than after_seq.
+
+    Replay stops at the first invalid record, including one that apply
+    rejects with ValueError, TypeError, AttributeError or IndexError, since
+    later records depend on it. Returns the sequence number of the last
+    applied record, or after_seq if none was applied.
+    """
+    last_seq = after_seq
+    for record in records:
+        try:
+            seq, kind, *payload = record
+            if not isinstance(seq, int) or kind not in RECORD_TYPES:
+                raise ValueError("unknown record")
+            if seq <= after_seq:
+                continue
+            if seq <= last_seq:
+                raise ValueError("sequence number out of order")
+            apply(seq, kind, payload)
+        except (ValueError, TypeError, AttributeError, IndexError) as err:
+            _LOGGER.warning("Stopping journal replay at invalid record %s: %s", record, err)
+            break
+        last_seq = seq
+    return last_seq
+
+
+class Journal:
+    """Per-entry write-ahead journal file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.size = 0
+
+    def load(self) -> list[list]:
+        """Read all complete records.
+
+        A truncated or corrupt final record (e.g. after a crash mid-write) is
+        dropped and cut from the file so that new records are appended after
+        the last valid one.
+        """
+        records: list[list] = []
+        valid_size = 0
+        try:
+            with open(self.path, "rb") as journal_file:
+                for line in journal_file:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    records.append(record)
+                    valid_size += len(line)
+        except FileNotFoundError:
+            self.size = 0
+            return records
+
+        if valid_size != os.path.getsize(self.path):
+            _LOGGER.warning(
+                "Discarding incomplete record at the end of journal %s", self.path
+            )
+            with open(self.path, "r+b") as journal_file:
+                journal_file.truncate(valid_size)
+
+        self.size = valid_size
+        return records
+
+    def append(self, records: list[list]) -> None:
+        """Append records and flush them to disk."""
+        data = "".join(
+            json.dumps(record, separators=(",", ":")) + "\n" for record in records
+        ).encode()
+        with open(self.path, "ab") as journal_file:
+            journal_file.write(data)
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+        self.size += len(data)
+
+    def clear(self) -> None:
+        """Remove all records once they are covered by a snapshot."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        self.size = 0
@@ -0,0 +1,132 @@
+"""Pure consumption model for Pellet Tracker.
+
+This module has no Home Assistant dependencies so that it can be shared by
+the live tracker and by worker processes (e.g. the configuration simulator).
+"""
+from __future__ import annotations
+
+from .const import (
+    CONF_POWER_LEVELS,
+    CONF_MAX_RATE,
+    DEFAULT_MAX_RATE,
+    DEFAULT_ALPHA,
+    DEFAULT_MIN_RATE_FACTOR,
+    DEFAULT_POWER_LEVELS,
+)
+
+# Unit for all rates: grams per hour (g/h)
+
+# Refills only calibrate if the tank was nearly empty (< 10% remaining)
+REFILL_CALIBRATION_THRESHOLD = 0.1
+
+
+def calculate_rates(config: dict) -> dict[str, int]:
+    """Calculate base consumption rates (g/h) for each configured power level."""
+    power_levels = config.get(CONF_POWER_LEVELS)
+    if not power_levels:
+        # Default to 1-5 if not specified
+        power_levels = DEFAULT_POWER_LEVELS
+
+    rates: dict[str, int] = {}
+
+    # We allow "0" to be an active level if the user explicitly includes it in power_levels
+    active_levels = [l for l in power_levels]
+
+    # Calculate rates for active levels using linear interpolation
+    num_levels = len(active_levels)
+    if num_levels > 0:
+        # Get max from config (stored in kg/h, convert to g/h)
+        max_rate = config.get(CONF_MAX_RATE, DEFAULT_MAX_RATE) * 1000
+
+        # Minimum rate for levels that would otherwise be 0 (e.g., power level "0").
+        # This allows calibration to learn the actual consumption for these levels.
+        # Set to ~5% of max rate as an initial estimate that can be adjusted via EWMA.
+        min_rate = max_rate * DEFAULT_MIN_RATE_FACTOR
+
+        # Try to parse levels as numbers to find the max level
+        try:
+            numeric_levels = [float(l) for l in active_levels]
+            max_level_val = max(numeric_levels)
+            is_numeric = True
+        except ValueError:
+            is_numeric = False
+
+        if is_numeric and max_level_val > 0:
+            # Interpolate based on numeric value relative to max level
+            for level_str, level_val in zip(active_levels, numeric_levels):
+                rate = (level_val / max_level_val) * max_rate
+                # Apply minimum rate to allow calibration for level 0 or similar
+                rates[level_str] = int(max(rate, min_rate))
+        else:
+            # Fallback to index-based interpolation if levels are not numeric
+            # Assumes levels are ordered from lowest to highest
+            for i, level in enumerate(active_levels):
+                rate = ((i + 1) / num_levels) * max_rate
+                # Apply minimum rate to allow calibration
+                rates[level] = int(max(rate, min_rate))
+
+    return rates
+
+
+def normalize_power(power: str) -> str:
+    """Normalize numeric power states to match keys like "1", "2"."""
+    try:
+        return str(int(float(power)))
+    except (ValueError, TypeError):
+        return power  # Keep original string if not numeric
+
+
+def fallback_rate(rates: dict[str, int]) -> int:
+    """Return the rate to use when the current power level is not configured."""
+    if "1" in rates:
+        return rates["1"]
+    if rates:
+        # Use the first available rate if "1" is not found
+        return next(iter(rates.values()))
+    return 0
+
+
+def drain(level_g: float, consumption_g: float) -> float:
+    """Return the level after consuming, clamped to 0."""
+    return max(level_g - consumption_g, 0.0)
+
+
+def refill_calibration_target(
+    level_g: float, tank_size_g: float, session_consumption_g: float
+) -> float | None:
+    """Return the actual consumption to calibrate with on refill, or None to skip.
+
+    When the tank is refilled nearly empty, we assume the entire tank was
+    consumed during the session (Actual = Tank Size).
+    """
+    if level_g < tank_size_g * REFILL_CALIBRATION_THRESHOLD and session_consumption_g > 0:
+        return tank_size_g
+    return None
+
+
+def clamp_error_ratio(actual_consumption_g: float, estimated_consumption_g: float) -> float:
+    """Return the calibration error ratio, limited to avoid wild swings."""
+    error_ratio = actual_consumption_g / estimated_consumption_g
+    return max(0.5, min(error_ratio, 2.0))
+
+
+def calibrate_factors(
+    correction_factors: dict[str, float],
+    session_consumption_by_level: dict[str, float],
+    estimated_consumption_g: float,
+    error_ratio: float,
+) -> dict[str, float]:
+    """Return updated EWMA correction factors for the levels used in a session.
+
+    The error is distributed to each level based on its share of the
+    estimated consumption. Levels not used during the session keep their factor.
+    """
+    new_factors = dict(correction_factors)
+    for level, level_consumption in session_consumption_by_level.items():
+        weight = level_consumption / estimated_consumption_g
+
+        old_factor = correction_factors.get(level, 1.0)
+        # Update factor: New = Old * (1 + Alpha * Weight * (Error - 1))
+        new_factors[level] = old_factor * (1 + DEFAULT_ALPHA * weight * (error_ratio - 1))
+
+    return new_factors
@@ -0,0 +1,251 @@
+"""What-if simulator for Pellet Tracker configurations.
+
+Replays a recorded status/power/refill timeline against candidate
+configurations using the same consumption, refill and EWMA calibration model
+as the live tracker. Candidates are evaluated in a process pool and only
+exchange plain, picklable data. This module does not import Home Assistant,
+so it can be tested directly, but spawned workers still import the
+integration package (and Home Assistant) once when they start.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from .const import (
+    CONF_TANK_SIZE,
+    CONF_ACTIVE_STATUSES,
+    CONF_MAX_RATE,
+    DEFAULT_TANK_SIZE,
+    DEFAULT_MAX_RATE,
+)
+from .model import (
+    calculate_rates,
+    normalize_power,
+    fallback_rate,
+    clamp_error_ratio,
+    calibrate_factors,
+    drain,
+    refill_calibration_target,
+)
+
+# Timeline event kinds: (timestamp in epoch seconds, kind, value)
+EVENT_STATUS = "status"
+EVENT_POWER = "power"
+EVENT_REFILL = "refill"
+
+
+def simulate_candidate(
+    config: dict,
+    timeline: list[tuple[float, str, str | None]],
+    start_ts: float,
+    end_ts: float,
+    correction_factors: dict[str, float] | None = None,
+) -> dict:
+    """Replay a timeline against a single configuration.
+
+    The tank level is only known right after a refill, so the replay starts
+    at the first recorded refill. Events before it only set the status and
+    power. If the timeline has no refill, nothing is replayed and
+    replayed_hours is 0. Calibration starts from the given correction
+    factors (e.g. the tracker's learned ones) and later refills apply the
+    tracker's refill logic. Times where the simulated level reaches zero
+    before a refill are counted as empty events, since the sensor would
+    have reported an empty tank too early.
+    """
+    tank_size_g = config.get(CONF_TANK_SIZE, DEFAULT_TANK_SIZE) * 1000
+    active_statuses = config.get(CONF_ACTIVE_STATUSES, [])
+    rates = calculate_rates(config)
+
+    level_g = tank_size_g
+    session_g = 0.0
+    session_by_level: dict[str, float] = {}
+    factors = dict(correction_factors or {})
+
+    # Time of the first refill, where the replay starts from a full tank
+    replay_start: float | None = None
+    total_g = 0.0
+    refill_count = 0
+    empty_events = 0
+    calibration_errors: list[float] = []
+    levels_at_refill: list[float] = []
+
+    def refill() -> None:
+        nonlocal level_g, session_g, session_by_level, factors
+        actual_g = refill_calibration_target(level_g, tank_size_g, session_g)
+        if actual_g is not None:
+            calibration_errors.append(abs(actual_g / session_g - 1))
+            error_ratio = clamp_error_ratio(actual_g, session_g)
+            factors = calibrate_factors(factors, session_by_level, session_g, error_ratio)
+        level_g = tank_size_g
+        session_g = 0.0
+        session_by_level = {}
+
+    def consume(power: str, rate: float, hours: float) -> None:
+        nonlocal level_g, session_g, total_g, empty_events
+        consumption = rate * factors.get(power, 1.0) * hours
+        if consumption <= 0:
+            return
+        session_by_level[power] = session_by_level.get(power, 0.0) + consumption
+        session_g += consumption
+        total_g += consumption
+        if level_g > 0 and consumption >= level_g:
+            # The sensor would report an empty tank while the stove keeps burning
+            empty_events += 1
+        # Clamp to 0
+        level_g = drain(level_g, consumption)
+
+    status = None
+    power = None
+    last_ts = start_ts
+    for ts, kind, value in [*timeline, (end_ts, None, None)]:
+        if ts > last_ts:
+            if replay_start is not None and status in active_statuses and power is not None:
+                rate = rates.get(power)
+                if rate is None:
+                    rate = fallback_rate(rates)
+                consume(power, rate, (ts - last_ts) / 3600.0)
+            last_ts = ts
+
+        if kind == EVENT_STATUS:
+            status = value
+        elif kind == EVENT_POWER:
+            power = normalize_power(value)
+        elif kind == EVENT_REFILL:
+            if replay_start is None:
+                # The tank starts full here, there is no session to evaluate
+                replay_start = ts
+                continue
+            refill_count += 1
+            if tank_size_g > 0:
+                levels_at_refill.append(level_g / tank_size_g * 100)
+            refill()
+
+    # Number of full tanks this configuration estimates were burned
+    projected_refills = total_g / tank_size_g if tank_size_g > 0 else 0.0
+    hours = (end_ts - replay_start) / 3600.0 if replay_start is not None else 0.0
+
+    return {
+        "name": config.get("name"),
+        "tank_size": tank_size_g / 1000,
+        "max_rate": config.get(CONF_MAX_RATE, DEFAULT_MAX_RATE),
+        "power_levels": list(rates),
+        "replayed_hours": round(hours, 2),
+        "refill_count": refill_count,
+        "projected_refills": round(projected_refills, 2),
+        "mean_refill_interval_h": (
+            round(hours / projected_refills, 2) if projected_refills > 0 else None
+        ),
+        "empty_events": empty_events,
+        "calibrations": len(calibration_errors),
+        "mean_calibration_error": (
+            round(sum(calibration_errors) / len(calibration_errors), 4)
+            if calibration_errors
+            else None
+        ),
+        "mean_level_at_refill_pct": (
+            round(sum(levels_at_refill) / len(levels_at_refill), 1)
+            if levels_at_refill
+            else None
+        ),
+        "final_level_kg": round(level_g / 1000, 2) if replay_start is not None else None,
+        "final_correction_factors": {
+            level: round(factor, 4) for level, factor in factors.items()
+        },
+    }
+
+
+def _simulate_chunk(
+    configs: list[dict],
+    timeline: list[tuple[float, str, str | None]],
+    start_ts: float,
+    end_ts: float,
+    correction_factors: dict[str, float],
+) -> list[dict]:
+    """Evaluate several candidates in a worker, so the timeline is sent once per chunk."""
+    return [
+        simulate_candidate(config, timeline, start_ts, end_ts, correction_factors)
+        for config in configs
+    ]
+
+
+def _rank_key(result: dict) -> tuple:
+    """Rank by calibration error, then by how close to empty refills happened."""
+    error = result["mean_calibration_error"]
+    level = result["mean_level_at_refill_pct"]
+    return (
+        error is None,
+        error if error is not None else 0.0,
+        level if level is not None else 100.0,
+        result["empty_events"],
+    )
+
+
+class SimulationPool:
+    """Process pool evaluating candidates, kept alive across service calls.
+
+    Worker processes are started on the first run and reused afterwards,
+    since each spawned worker has to import the integration package (and so
+    Home Assistant) before it can evaluate anything.
+    """
+
+    def __init__(self, max_workers: int | None = None) -> None:
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Use "spawn" as forking a multi-threaded process (Home Assistant) is unsafe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def run(
+        self,
+        configs: list[dict],
+        timeline: list[tuple[float, str, str | None]],
+        start_ts: float,
+        end_ts: float,
+        correction_factors: dict[str, float] | None = None,
+    ) -> list[dict]:
+        """Evaluate all candidate configurations and rank them.
+
+        This call blocks and must be run in an executor.
+        """
+        correction_factors = dict(correction_factors or {})
+        chunk_count = min(len(configs), self.max_workers)
+        if chunk_count <= 1:
+            # Not worth a round trip through the pool
+            results = _simulate_chunk(configs, timeline, start_ts, end_ts, correction_factors)
+        else:
+            pool = self._get_pool()
+            futures = [
+                pool.submit(
+                    _simulate_chunk,
+                    configs[index::chunk_count],
+                    timeline,
+                    start_ts,
+                    end_ts,
+                    correction_factors,
+                )
+                for index in range(chunk_count)
+            ]
+            results = [result for future in futures for result in future.result()]
+
+        results.sort(key=_rank_key)
+        for rank, result in enumerate(results, start=1):
+            result["rank"] = rank
+        return results
+
+    def shutdown(self) -> None:
+        """Stop the worker processes. Blocking."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
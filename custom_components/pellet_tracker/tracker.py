@@ -1,11 +1,18 @@
 """Pellet Tracker Logic."""
+from __future__ import annotations
+
+import asyncio
 import logging
 from datetime import datetime, timedelta
+from functools import partial
+from typing import TYPE_CHECKING
 
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.event import async_track_time_interval, async_track_state_change_event
-from homeassistant.helpers.storage import Store
+from homeassistant.helpers.storage import STORAGE_DIR, Store
 from homeassistant.util import dt as dt_util
 
 from .const import (
@@ -15,18 +22,49 @@ from .const import (
     CONF_TANK_SIZE,
     CONF_ACTIVE_STATUSES,
     CONF_POWER_LEVELS,
-    CONF_MAX_RATE,
+    CONF_JOURNAL,
     DEFAULT_TANK_SIZE,
-    DEFAULT_MAX_RATE,
-    DEFAULT_ALPHA,
-    DEFAULT_MIN_RATE_FACTOR,
+    DEFAULT_JOURNAL,
+)
+from .consumption_index import ConsumptionIndex
+from .journal import (
+    Journal,
+    RECORD_CONSUMPTION,
+    RECORD_CALIBRATION,
+    RECORD_REFILL,
+    RECORD_SET_LEVEL,
+    replay,
+)
+from .model import (
+    calculate_rates,
+    normalize_power,
+    fallback_rate,
+    clamp_error_ratio,
+    calibrate_factors,
+    drain,
+    refill_calibration_target,
+    REFILL_CALIBRATION_THRESHOLD,
 )
+from .simulator import (
+    EVENT_STATUS,
+    EVENT_POWER,
+    EVENT_REFILL,
+    SimulationPool,
+)
+
+if TYPE_CHECKING:
+    from .fleet import FleetEngine
 
 _LOGGER = logging.getLogger(__name__)
 
 STORAGE_KEY = f"{DOMAIN}.storage"
 STORAGE_VERSION = 1
 UPDATE_INTERVAL = timedelta(minutes=1)
+# Journal mode: fold the journal into a snapshot periodically or when it grows too large
+JOURNAL_COMPACT_INTERVAL = timedelta(hours=1)
+JOURNAL_MAX_BYTES = 64 * 1024
+# The consumption index is saved separately, at most this often (seconds)
+INDEX_SAVE_DELAY = 300
 
 # Default rates are now calculated dynamically
 # Unit: grams per hour (g/h)
@@ -34,71 +72,98 @@ UPDATE_INTERVAL = timedelta(minutes=1)
 class PelletTracker:
     """Class to manage pellet consumption."""
 
-    def __init__(self, hass: HomeAssistant, config: dict, entry_id: str, name: str) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config: dict,
+        entry_id: str,
+        name: str,
+        fleet: FleetEngine | None = None,
+    ) -> None:
         self.hass = hass
         self.config = config
         self.entry_id = entry_id
         self.name = name
+        # Optional FleetEngine. Once attached, level, session consumption and
+        # last update are read from and written to the engine's array slot.
+        self._fleet = fleet
+        self._fleet_slot = None
+        self._fleet_power = None
         # Unique storage key per entry to support multiple stoves if needed
         self._store = Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}_{entry_id}")
+        # The lifetime consumption index only grows, so it gets its own, delayed Store
+        self._index_store = Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}_{entry_id}_index")
+        self._index_save_scheduled = False
+        # Journal sequence number covered by the saved index
+        self._index_seq = 0
+        # Write-ahead journal, appended to on each change when journal mode is enabled.
+        # It is always replayed on startup, in case journal mode was just turned off.
+        self._journal = Journal(hass.config.path(STORAGE_DIR, f"{STORAGE_KEY}_{entry_id}.journal"))
+        self._journal_enabled = config.get(CONF_JOURNAL, DEFAULT_JOURNAL)
+        self._journal_lock = asyncio.Lock()
+        self._journal_seq = 0
+        self._pending_records = []
         
         self.tank_size_g = config.get(CONF_TANK_SIZE, DEFAULT_TANK_SIZE) * 1000
         self.active_statuses = config.get(CONF_ACTIVE_STATUSES, [])
         
         self.current_level_g = self.tank_size_g
         
-        # Initialize rates based on configured power levels
-        power_levels = config.get(CONF_POWER_LEVELS)
-        if not power_levels:
-            # Default to 1-5 if not specified
-            power_levels = ["1", "2", "3", "4", "5"]
-
-        self.rates = {}
-        
-        # We allow "0" to be an active level if the user explicitly includes it in power_levels
-        active_levels = [l for l in power_levels]
-            
-        # Calculate rates for active levels using linear interpolation
-        num_levels = len(active_levels)
-        if num_levels > 0:
-            # Get max from config (stored in kg/h, convert to g/h)
-            max_rate = config.get(CONF_MAX_RATE, DEFAULT_MAX_RATE) * 1000
-            
-            # Minimum rate for levels that would otherwise be 0 (e.g., power level "0").
-            # This allows calibration to learn the actual consumption for these levels.
-            # Set to ~5% of max rate as an initial estimate that can be adjusted via EWMA.
-            min_rate = max_rate * DEFAULT_MIN_RATE_FACTOR
-            
-            # Try to parse levels as numbers to find the max level
-            try:
-                numeric_levels = [float(l) for l in active_levels]
-                max_level_val = max(numeric_levels)
-                is_numeric = True
-            except ValueError:
-                is_numeric = False
-            
-            if is_numeric and max_level_val > 0:
-                # Interpolate based on numeric value relative to max level
-                for level_str, level_val in zip(active_levels, numeric_levels):
-                    rate = (level_val / max_level_val) * max_rate
-                    # Apply minimum rate to allow calibration for level 0 or similar
-                    self.rates[level_str] = int(max(rate, min_rate))
-            else:
-                # Fallback to index-based interpolation if levels are not numeric
-                # Assumes levels are ordered from lowest to highest
-                for i, level in enumerate(active_levels):
-                    rate = ((i + 1) / num_levels) * max_rate
-                    # Apply minimum rate to allow calibration
-                    self.rates[level] = int(max(rate, min_rate))
+        # Base rates are derived from the configured power levels and max rate
+        self.rates = calculate_rates(config)
 
         self.total_consumed_session_g = 0.0
         self.correction_factors = {}
         self.session_consumption_by_level = {}
+        # Lifetime consumption, unaffected by refills and manual level changes
+        self.consumption_index = ConsumptionIndex()
         self.last_update = dt_util.utcnow()
         
         self._listeners = []
         self._remove_listeners = []
 
+    @property
+    def current_level_g(self) -> float:
+        """Remaining pellets (g)."""
+        if self._fleet_slot is not None:
+            return float(self._fleet.level_g[self._fleet_slot])
+        return self._current_level_g
+
+    @current_level_g.setter
+    def current_level_g(self, value: float) -> None:
+        if self._fleet_slot is not None:
+            self._fleet.level_g[self._fleet_slot] = value
+        else:
+            self._current_level_g = value
+
+    @property
+    def total_consumed_session_g(self) -> float:
+        """Estimated consumption (g) since the last refill or manual level."""
+        if self._fleet_slot is not None:
+            return float(self._fleet.session_g[self._fleet_slot])
+        return self._total_consumed_session_g
+
+    @total_consumed_session_g.setter
+    def total_consumed_session_g(self, value: float) -> None:
+        if self._fleet_slot is not None:
+            self._fleet.session_g[self._fleet_slot] = value
+        else:
+            self._total_consumed_session_g = value
+
+    @property
+    def last_update(self) -> datetime:
+        """Time up to which consumption has been accounted for."""
+        if self._fleet_slot is not None:
+            return dt_util.utc_from_timestamp(float(self._fleet.last_settled[self._fleet_slot]))
+        return self._last_update
+
+    @last_update.setter
+    def last_update(self, value: datetime) -> None:
+        if self._fleet_slot is not None:
+            self._fleet.last_settled[self._fleet_slot] = value.timestamp()
+        else:
+            self._last_update = value
+
     async def async_initialize(self):
         """Load data and start tracking."""
         restored = await self._store.async_load()
@@ -118,6 +183,8 @@ class PelletTracker:
             self.correction_factors = {str(k): v for k, v in self.correction_factors.items()}
             self.session_consumption_by_level = {str(k): v for k, v in self.session_consumption_by_level.items()}
 
+            self._journal_seq = restored.get("journal_seq", 0)
+
             _LOGGER.debug(
                 "Restored state: Level=%.1fkg, Calibration Factors=%s. Base Rates (Config)=%s", 
                 self.current_level_g / 1000, 
@@ -125,10 +192,28 @@ class PelletTracker:
                 self.rates
             )
 
+        restored_index = await self._index_store.async_load()
+        if restored_index:
+            self.consumption_index = ConsumptionIndex.from_dict(restored_index.get("index"))
+            self._index_seq = restored_index.get("journal_seq", 0)
+
+        await self._async_replay_journal()
+
         # Start tracking
-        self._remove_listeners.append(
-            async_track_time_interval(self.hass, self._async_update_consumption, UPDATE_INTERVAL)
-        )
+        if self._fleet is not None:
+            # The fleet engine's timer settles all trackers at once
+            self._fleet_slot = self._fleet.register(
+                self,
+                self.current_level_g,
+                self.total_consumed_session_g,
+                self.tank_size_g,
+                self.last_update.timestamp(),
+            )
+            self._fleet_update_rate()
+        else:
+            self._remove_listeners.append(
+                async_track_time_interval(self.hass, self._async_update_consumption, UPDATE_INTERVAL)
+            )
         
         self._remove_listeners.append(
             async_track_state_change_event(
@@ -138,12 +223,30 @@ class PelletTracker:
             )
         )
 
+        if self._journal_enabled:
+            self._remove_listeners.append(
+                async_track_time_interval(self.hass, self._async_compact_journal, JOURNAL_COMPACT_INTERVAL)
+            )
+
     def close(self):
         """Cleanup listeners."""
         for remove in self._remove_listeners:
             remove()
         self._remove_listeners.clear()
 
+        if self._fleet_slot is not None:
+            # Detach from the engine, keeping the slot's values. Pending
+            # consumption is recorded here and persisted by async_flush.
+            self._fleet_settle()
+            level, session, last_update = (
+                self.current_level_g, self.total_consumed_session_g, self.last_update
+            )
+            self._fleet.unregister(self._fleet_slot)
+            self._fleet_slot = None
+            self.current_level_g = level
+            self.total_consumed_session_g = session
+            self.last_update = last_update
+
     def add_listener(self, callback_func):
         """Add a listener for state updates."""
         self._listeners.append(callback_func)
@@ -156,100 +259,183 @@ class PelletTracker:
 
     async def _async_handle_state_change(self, event):
         """Handle state changes immediately."""
-        await self._async_update_consumption()
-
-    async def _async_update_consumption(self, now=None):
-        """Calculate consumption."""
-        current_time = dt_util.utcnow()
-        elapsed_hours = (current_time - self.last_update).total_seconds() / 3600.0
-        self.last_update = current_time
-        
-        if elapsed_hours <= 0:
-            return
+        if self._fleet_slot is not None:
+            await self._async_fleet_state_change()
+        else:
+            await self._async_update_consumption()
 
+    def _current_rate(self) -> tuple[str | None, float]:
+        """Return the current power level and effective consumption rate (g/h)."""
         # Get current status and power
         status_state = self.hass.states.get(self.config[CONF_STATUS_ENTITY])
         power_state = self.hass.states.get(self.config[CONF_POWER_ENTITY])
         
         if not status_state or not power_state:
-            return
+            return None, 0.0
             
         status = status_state.state
         
-        power = power_state.state
-        # Try to normalize numeric power to match keys like "1", "2"
-        try:
-            power = str(int(float(power)))
-        except (ValueError, TypeError):
-            pass # Keep original string if not numeric
+        # Normalize numeric power to match keys like "1", "2"
+        power = normalize_power(power_state.state)
+
+        if status not in self.active_statuses:
+            return power, 0.0
+
+        rate = self.rates.get(power)
+        if rate is None:
+            _LOGGER.warning(
+                "Stove is active (Status: %s) but Power Level '%s' is not configured in %s. "
+                "Assuming 0 consumption. Please update configuration.",
+                status, power, CONF_POWER_LEVELS
+            )
+            rate = fallback_rate(self.rates)
+        
+        # Apply correction factor for this specific level
+        factor = self.correction_factors.get(power, 1.0)
+        return power, rate * factor
+
+    async def _async_update_consumption(self, now=None):
+        """Calculate consumption."""
+        current_time = dt_util.utcnow()
+        previous_update = self.last_update
+        elapsed_hours = (current_time - previous_update).total_seconds() / 3600.0
+        self.last_update = current_time
+        
+        if elapsed_hours <= 0:
+            return
 
         # Calculate consumption
-        consumption = 0.0
-        if status in self.active_statuses:
-            rate = self.rates.get(power)
-            if rate is None:
-                _LOGGER.warning(
-                    "Stove is active (Status: %s) but Power Level '%s' is not configured in %s. "
-                    "Assuming 0 consumption. Please update configuration.",
-                    status, power, CONF_POWER_LEVELS
-                )
-                # Fallback logic
-                if "1" in self.rates:
-                    rate = self.rates["1"]
-                elif self.rates:
-                    # Use the first available rate if "1" is not found
-                    rate = next(iter(self.rates.values()))
-                else:
-                    rate = 0
-            
-            # Apply correction factor for this specific level
-            factor = self.correction_factors.get(power, 1.0)
-            consumption = (rate * factor) * elapsed_hours
-            
-            # Track consumption per level for calibration
-            if consumption > 0:
-                current_level_consumption = self.session_consumption_by_level.get(power, 0.0)
-                self.session_consumption_by_level[power] = current_level_consumption + consumption
+        power, rate = self._current_rate()
+        consumption = rate * elapsed_hours
             
         if consumption > 0:
-            self.current_level_g -= consumption
-            self.total_consumed_session_g += consumption
-            
-            # Clamp to 0
-            if self.current_level_g < 0:
-                self.current_level_g = 0
+            start_ts = previous_update.timestamp()
+            end_ts = current_time.timestamp()
+            self._apply_consumption(start_ts, end_ts, power, consumption)
+            self._index_consumption(start_ts, end_ts, power, consumption)
+            self._journal_record(RECORD_CONSUMPTION, start_ts, end_ts, power, consumption)
                 
             self._notify_listeners()
-            await self._async_save_data()
+            await self._async_persist()
+
+    def _fleet_flush(self) -> float:
+        """Record consumption the fleet engine applied to this tracker's slot.
+
+        The engine accumulates consumption at a single rate until it is taken,
+        so it is recorded as one segment at the current power level.
+        """
+        if self._fleet_slot is None:
+            return 0.0
+        start_ts, end_ts, consumption = self._fleet.take_pending(self._fleet_slot)
+        if consumption > 0:
+            self._record_consumption(self._fleet_power, consumption)
+            self._index_consumption(start_ts, end_ts, self._fleet_power, consumption)
+            self._journal_record(RECORD_CONSUMPTION, start_ts, end_ts, self._fleet_power, consumption)
+        return consumption
+
+    def _fleet_settle(self) -> float:
+        """Settle this tracker's slot up to now and record its pending consumption."""
+        self._fleet.settle_slot(self._fleet_slot, dt_util.utcnow().timestamp())
+        return self._fleet_flush()
+
+    def _fleet_update_rate(self):
+        """Settle at the previous rate, then push the current active flag and effective rate."""
+        self._fleet_settle()
+        self._fleet_power, rate = self._current_rate()
+        self._fleet.set_rate(self._fleet_slot, rate > 0, rate)
+
+    async def _async_fleet_state_change(self):
+        """Switch to the rate of the new stove state."""
+        consumption = self._fleet_settle()
+        self._fleet_update_rate()
+        if consumption > 0:
+            self._notify_listeners()
+            await self._async_persist()
+
+    @callback
+    def async_fleet_updated(self, save: bool) -> None:
+        """Handle a fleet tick that changed the shown level or made a save due."""
+        self._notify_listeners()
+        if save:
+            self.hass.async_create_task(self._async_persist())
+
+    async def async_flush(self):
+        """Persist all state now, e.g. on unload or shutdown."""
+        if self._fleet_slot is not None:
+            self._fleet_settle()
+        await self._async_persist()
+        await self.async_save_index()
+
+    def _record_consumption(self, power: str, consumption: float):
+        """Track consumption per level for calibration."""
+        current_level_consumption = self.session_consumption_by_level.get(power, 0.0)
+        self.session_consumption_by_level[power] = current_level_consumption + consumption
+
+    def _index_consumption(self, start_ts: float, end_ts: float, power: str, consumption: float):
+        """Add consumption to the lifetime index and schedule saving it."""
+        self.consumption_index.record(start_ts, end_ts, power, consumption)
+        if not self._index_save_scheduled:
+            # async_delay_save restarts its timer on each call, only call it once per save
+            self._index_save_scheduled = True
+            self._index_store.async_delay_save(self._index_data, INDEX_SAVE_DELAY)
+
+    @callback
+    def _index_data(self) -> dict:
+        """Return the index data to save."""
+        self._index_save_scheduled = False
+        return {
+            "journal_seq": self._journal_seq,
+            "index": self.consumption_index.as_dict(),
+        }
+
+    async def async_save_index(self):
+        """Save the consumption index now, e.g. on unload."""
+        await self._index_store.async_save(self._index_data())
+
+    def _apply_consumption(self, start_ts: float, end_ts: float, power: str, consumption: float):
+        """Apply consumption at the given power level over [start_ts, end_ts]."""
+        self._record_consumption(power, consumption)
+
+        # Clamp to 0
+        self.current_level_g = drain(self.current_level_g, consumption)
+        self.total_consumed_session_g += consumption
 
     async def async_refill(self):
         """Refill the tank to full."""
         _LOGGER.info("Refill requested. Current Level: %.2f kg", self.current_level_g / 1000)
+        if self._fleet_slot is not None:
+            self._fleet_settle()
 
         # EWMA Auto-Calibration (Per-Level)
         # We only calibrate if the tank is nearly empty (< 10% remaining)
-        threshold = self.tank_size_g * 0.1
+        actual_consumption_g = refill_calibration_target(
+            self.current_level_g, self.tank_size_g, self.total_consumed_session_g
+        )
         
-        if self.current_level_g < threshold and self.total_consumed_session_g > 0:
-            # Assume we consumed the entire tank (Actual = Tank Size)
-            await self._async_calibrate(self.tank_size_g)
+        if actual_consumption_g is not None:
+            await self._async_calibrate(actual_consumption_g)
         else:
             _LOGGER.debug(
                 "Skipping calibration during refill. Level (%.2f kg) >= Threshold (%.2f kg) or No Consumption (%.2f kg)",
                 self.current_level_g / 1000,
-                threshold / 1000,
+                self.tank_size_g * REFILL_CALIBRATION_THRESHOLD / 1000,
                 self.total_consumed_session_g / 1000
             )
 
-        self.current_level_g = self.tank_size_g
-        self.total_consumed_session_g = 0
-        self.session_consumption_by_level = {} # Reset session tracking
+        self._apply_refill()
+        self._journal_record(RECORD_REFILL)
         self.last_update = dt_util.utcnow()
         
         _LOGGER.info("Refill complete. New Level: %.2f kg", self.current_level_g / 1000)
-        await self._async_save_data()
+        await self._async_persist()
         self._notify_listeners()
 
+    def _apply_refill(self):
+        """Fill the tank and start a new session."""
+        self.current_level_g = self.tank_size_g
+        self.total_consumed_session_g = 0
+        self.session_consumption_by_level = {} # Reset session tracking
+
     async def _async_calibrate(self, actual_consumption_g: float):
         """Run EWMA calibration based on actual consumption."""
         estimated_consumption = self.total_consumed_session_g
@@ -259,10 +445,8 @@ class PelletTracker:
 
         _LOGGER.debug("Starting Calibration. Current Factors: %s", self.correction_factors)
 
-        error_ratio = actual_consumption_g / estimated_consumption
-        
         # Limit the error ratio to avoid wild swings
-        error_ratio = max(0.5, min(error_ratio, 2.0))
+        error_ratio = clamp_error_ratio(actual_consumption_g, estimated_consumption)
         
         _LOGGER.info(
             "Auto-Calibrating Rates. Estimated: %.2f kg, Actual: %.2f kg. Ratio: %.3f",
@@ -272,19 +456,27 @@ class PelletTracker:
         )
         
         # Distribute error to levels based on their contribution
+        old_factors = self.correction_factors
+        self.correction_factors = calibrate_factors(
+            old_factors,
+            self.session_consumption_by_level,
+            estimated_consumption,
+            error_ratio,
+        )
+
         for level, level_consumption in self.session_consumption_by_level.items():
-            weight = level_consumption / estimated_consumption
-            
-            old_factor = self.correction_factors.get(level, 1.0)
-            # Update factor: New = Old * (1 + Alpha * Weight * (Error - 1))
-            new_factor = old_factor * (1 + DEFAULT_ALPHA * weight * (error_ratio - 1))
-            
-            self.correction_factors[level] = new_factor
-            
             _LOGGER.debug(
                 "Calibrating Level %s: Weight=%.2f, Old Factor=%.3f, New Factor=%.3f",
-                level, weight, old_factor, new_factor
+                level,
+                level_consumption / estimated_consumption,
+                old_factors.get(level, 1.0),
+                self.correction_factors[level],
             )
+        self._journal_record(RECORD_CALIBRATION, dict(self.correction_factors))
+        if self._fleet_slot is not None:
+            # The effective rate of the current level may have changed.
+            # This settles at the previous rate first.
+            self._fleet_update_rate()
             
         _LOGGER.debug("Calibration Complete. Updated Factors: %s", self.correction_factors)
         
@@ -294,14 +486,96 @@ class PelletTracker:
         }
         _LOGGER.debug("New Effective Rates (g/h): %s", effective_rates)
 
+    def _journal_record(self, kind: str, *payload):
+        """Queue a journal record for a change that was just applied."""
+        if not self._journal_enabled:
+            return
+        self._journal_seq += 1
+        self._pending_records.append([self._journal_seq, kind, *payload])
+
+    async def _async_persist(self):
+        """Persist applied changes, to the journal or as a full snapshot."""
+        if self._fleet_slot is not None:
+            self._fleet_flush()
+            self._fleet.mark_saved(self._fleet_slot)
+
+        if not self._journal_enabled:
+            await self._async_save_data()
+            return
+
+        # Take the records now so the FIFO lock keeps them in order
+        records, self._pending_records = self._pending_records, []
+        async with self._journal_lock:
+            if records:
+                await self.hass.async_add_executor_job(self._journal.append, records)
+            if self._journal.size > JOURNAL_MAX_BYTES:
+                await self._async_save_snapshot()
+
+    async def _async_compact_journal(self, now=None):
+        """Fold the journal into a snapshot."""
+        async with self._journal_lock:
+            if self._journal.size > 0:
+                await self._async_save_snapshot()
+
+    async def _async_save_snapshot(self):
+        """Save a snapshot and clear the journal it covers. Requires the journal lock."""
+        # The snapshot records the last applied sequence number, so records that
+        # are still pending or survive a crash before the clear are skipped on replay.
+        # The index must not lag behind the records being cleared.
+        await self.async_save_index()
+        await self._async_save_data()
+        await self.hass.async_add_executor_job(self._journal.clear)
+        _LOGGER.debug("Journal compacted into snapshot at sequence %d", self._journal_seq)
+
+    async def _async_replay_journal(self):
+        """Apply journal records newer than the restored snapshot."""
+        records = await self.hass.async_add_executor_job(self._journal.load)
+        if not records:
+            return
+
+        snapshot_seq = self._journal_seq
+        # The index is saved on its own schedule and may be ahead of or behind the snapshot
+        index_seq = self._index_seq
+
+        def apply(seq: int, kind: str, payload: list) -> None:
+            if kind == RECORD_CONSUMPTION:
+                start_ts, end_ts, power, consumption = payload
+                if seq > index_seq:
+                    self.consumption_index.record(start_ts, end_ts, str(power), consumption)
+                if seq > snapshot_seq:
+                    self._apply_consumption(start_ts, end_ts, str(power), consumption)
+            elif seq <= snapshot_seq:
+                return
+            elif kind == RECORD_CALIBRATION:
+                self.correction_factors = {str(k): v for k, v in payload[0].items()}
+            elif kind == RECORD_REFILL:
+                self._apply_refill()
+            elif kind == RECORD_SET_LEVEL:
+                self._apply_set_level(payload[0])
+
+        after_seq = min(snapshot_seq, index_seq)
+        last_seq = replay(records, after_seq, apply)
+        self._journal_seq = max(snapshot_seq, last_seq)
+
+        _LOGGER.debug(
+            "Replayed journal records %d to %d. Level=%.1fkg",
+            after_seq + 1, last_seq, self.current_level_g / 1000
+        )
+        async with self._journal_lock:
+            await self._async_save_snapshot()
+
     async def _async_save_data(self):
         """Save data to storage."""
+        # The saved level includes pending fleet consumption, record it with this save
+        self._fleet_flush()
         data = {
             "current_level_g": self.current_level_g,
             "rates": self.rates,
             "total_consumed_session_g": self.total_consumed_session_g,
-            "correction_factors": self.correction_factors,
-            "session_consumption_by_level": self.session_consumption_by_level,
+            # Copies, so changes applied while the file is written stay out of this snapshot
+            "correction_factors": dict(self.correction_factors),
+            "session_consumption_by_level": dict(self.session_consumption_by_level),
+            "journal_seq": self._journal_seq,
         }
         await self._store.async_save(data)
 
@@ -318,6 +592,8 @@ class PelletTracker:
     async def async_set_level(self, level_pct: int, calibrate: bool = False):
         """Manually set the current level."""
         _LOGGER.info("Manual level set requested. Target: %d%%, Calibrate: %s", level_pct, calibrate)
+        if self._fleet_slot is not None:
+            self._fleet_settle()
         
         # Calculate grams from percentage
         new_level_g = (level_pct / 100.0) * self.tank_size_g
@@ -356,11 +632,138 @@ class PelletTracker:
         # Let's reset session only if we calibrated OR if the change is significant?
         # For simplicity and correctness, setting a manual level establishes a new known state.
         # We should reset the session counters so the next period starts fresh from this known level.
+        self._apply_set_level(new_level_g)
+        self._journal_record(RECORD_SET_LEVEL, new_level_g)
+        
+        _LOGGER.info("Manual level set complete. New Level: %.2f kg", self.current_level_g / 1000)
+        self._notify_listeners()
+        await self._async_persist()
+
+    def _apply_set_level(self, new_level_g: float):
+        """Set the current level and start a new session."""
         self.total_consumed_session_g = 0
         self.session_consumption_by_level = {}
         
         self.current_level_g = new_level_g
-        
-        _LOGGER.info("Manual level set complete. New Level: %.2f kg", self.current_level_g / 1000)
-        self._notify_listeners()
-        await self._async_save_data()
+
+    def query_consumption(self, ranges: list[tuple[datetime, datetime]]) -> list[dict]:
+        """Return the consumption for each (start, end) range."""
+        if self._fleet_slot is not None:
+            # Index consumption pending in the fleet engine, its save is already scheduled
+            self._fleet_settle()
+        results = []
+        for start, end in ranges:
+            start_ts = start.timestamp()
+            end_ts = end.timestamp()
+            results.append(
+                {
+                    "start": start.isoformat(),
+                    "end": end.isoformat(),
+                    "consumed_kg": round(
+                        self.consumption_index.consumption_between(start_ts, end_ts) / 1000, 3
+                    ),
+                    "consumed_kg_by_level": {
+                        level: round(
+                            self.consumption_index.consumption_between(start_ts, end_ts, level) / 1000, 3
+                        )
+                        for level in self.consumption_index.cumulative_by_level
+                    },
+                }
+            )
+        return results
+
+    async def async_simulate(
+        self, pool: SimulationPool, candidates: list[dict], days: int
+    ) -> dict:
+        """Replay recorded history against candidate configurations.
+
+        The current configuration is always evaluated as a baseline. Each
+        candidate overrides keys of the current configuration, and all of
+        them start from the correction factors learned so far.
+        """
+        if "recorder" not in self.hass.config.components:
+            raise ServiceValidationError("Simulation requires the recorder integration")
+
+        # The recorder is optional, only load it when a simulation is requested
+        from homeassistant.components.recorder import get_instance, history
+
+        end_time = dt_util.utcnow()
+        start_time = end_time - timedelta(days=days)
+
+        status_entity = self.config[CONF_STATUS_ENTITY]
+        power_entity = self.config[CONF_POWER_ENTITY]
+        entity_ids = [status_entity, power_entity]
+
+        # Refills are recorded as presses of this entry's refill button
+        refill_entity = er.async_get(self.hass).async_get_entity_id(
+            "button", DOMAIN, f"{self.entry_id}_refill"
+        )
+        if refill_entity:
+            entity_ids.append(refill_entity)
+
+        states = await get_instance(self.hass).async_add_executor_job(
+            partial(
+                history.get_significant_states,
+                self.hass,
+                start_time,
+                end_time,
+                entity_ids,
+                significant_changes_only=False,
+            )
+        )
+
+        kinds = {status_entity: EVENT_STATUS, power_entity: EVENT_POWER}
+        timeline = []
+        for entity_id, entity_states in states.items():
+            if entity_id == refill_entity:
+                # The button state is the timestamp of its last press
+                for state in entity_states:
+                    pressed = dt_util.parse_datetime(state.state)
+                    if pressed is not None and start_time <= pressed <= end_time:
+                        timeline.append((pressed.timestamp(), EVENT_REFILL, None))
+            else:
+                for state in entity_states:
+                    timeline.append(
+                        (state.last_changed.timestamp(), kinds[entity_id], state.state)
+                    )
+        # Restored button states repeat the same press, keep each press once
+        timeline = sorted(set(timeline), key=lambda event: (event[0], event[1]))
+
+        configs = [{**self.config, "name": "current"}]
+        for index, candidate in enumerate(candidates, start=1):
+            configs.append(
+                {**self.config, **candidate, "name": candidate.get("name", f"candidate_{index}")}
+            )
+
+        # The replay starts at the first refill, the first time the tank level is known
+        replay_start = next(
+            (dt_util.utc_from_timestamp(ts) for ts, kind, _ in timeline if kind == EVENT_REFILL),
+            None,
+        )
+        if replay_start is None:
+            _LOGGER.warning(
+                "No refill recorded for %s since %s, nothing to simulate", self.name, start_time
+            )
+
+        _LOGGER.debug(
+            "Simulating %d configurations over %d events since %s",
+            len(configs), len(timeline), replay_start
+        )
+
+        results = await self.hass.async_add_executor_job(
+            pool.run,
+            configs,
+            timeline,
+            start_time.timestamp(),
+            end_time.timestamp(),
+            dict(self.correction_factors),
+        )
+
+        return {
+            "start": start_time.isoformat(),
+            "end": end_time.isoformat(),
+            "events": len(timeline),
+            # None if no refill was recorded in the window, nothing was replayed then
+            "replay_start": replay_start.isoformat() if replay_start is not None else None,
+            "results": results,
+        }
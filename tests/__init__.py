@@ -0,0 +1 @@
+"""Tests for the Pellet Tracker integration."""
@@ -0,0 +1,64 @@
+"""Benchmark the fleet engine tick.
+
+Run from the repository root with ``python -m tests.benchmark_fleet``.
+
+Simulates an hour of one-minute ticks for fleets of increasing size, with
+80% of the stoves burning at random rates, and reports the time per tick and
+how many trackers the tick hands back for notification and saving.
+"""
+import random
+import statistics
+import time
+
+from tests import conftest  # noqa: F401  Registers the integration package
+from custom_components.pellet_tracker.fleet import FleetEngine
+
+T0 = 1_700_000_000.0
+TICKS = 60
+FLEET_SIZES = (10, 100, 1000, 10000)
+
+
+def benchmark(size: int) -> dict:
+    """Return tick timings and per-tick tracker calls for a fleet."""
+    rng = random.Random(size)
+    engine = FleetEngine()
+    for index in range(size):
+        engine.register(index, rng.uniform(1000, 15000), 0.0, 15000.0, T0)
+        if rng.random() < 0.8:
+            engine.set_rate(index, True, rng.uniform(500, 2000))
+
+    timings = []
+    notified = saved = 0
+    for tick in range(1, TICKS + 1):
+        start = time.perf_counter()
+        notify, save = engine.tick(T0 + tick * 60)
+        timings.append(time.perf_counter() - start)
+
+        notified += len(notify)
+        saved += len(save)
+        # What a tracker does when its save is due
+        for slot in save.tolist():
+            engine.take_pending(slot)
+            engine.mark_saved(slot)
+
+    return {
+        "size": size,
+        "active": int(engine.active.sum()),
+        "tick_us": statistics.median(timings) * 1e6,
+        "notified": notified / TICKS,
+        "saved": saved / TICKS,
+    }
+
+
+def main() -> None:
+    print(f"{'stoves':>7} {'active':>7} {'tick (us)':>10} {'notify/tick':>12} {'save/tick':>10}")
+    for size in FLEET_SIZES:
+        result = benchmark(size)
+        print(
+            f"{result['size']:>7} {result['active']:>7} {result['tick_us']:>10.1f} "
+            f"{result['notified']:>12.1f} {result['saved']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
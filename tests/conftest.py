@@ -0,0 +1,20 @@
+"""Shared fixtures for Pellet Tracker tests.
+
+The modules under test (model, simulator, consumption index, journal, fleet
+engine) do not import Home Assistant. Register the integration package
+without running its ``__init__`` so they can be imported on their own.
+"""
+import sys
+import types
+from pathlib import Path
+
+PACKAGE = "custom_components.pellet_tracker"
+PACKAGE_DIR = Path(__file__).parent.parent / "custom_components" / "pellet_tracker"
+
+if PACKAGE not in sys.modules:
+    namespace = types.ModuleType("custom_components")
+    namespace.__path__ = [str(PACKAGE_DIR.parent)]
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [str(PACKAGE_DIR)]
+    sys.modules.setdefault("custom_components", namespace)
+    sys.modules[PACKAGE] = package
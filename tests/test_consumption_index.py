@@ -0,0 +1,118 @@
+"""Tests for the cumulative consumption index."""
+import random
+
+import pytest
+
+from custom_components.pellet_tracker.consumption_index import ConsumptionIndex
+
+MINUTE = 60.0
+
+
+def _brute_force(segments, start_ts, end_ts, level=None):
+    """Sum the overlap of uniform segments with [start_ts, end_ts]."""
+    total = 0.0
+    for seg_start, seg_end, seg_level, grams in segments:
+        if level is not None and seg_level != level:
+            continue
+        overlap = min(seg_end, end_ts) - max(seg_start, start_ts)
+        if overlap > 0:
+            total += grams * overlap / (seg_end - seg_start)
+    return total
+
+
+def test_collinear_segments_are_merged():
+    """Constant-rate updates keep one point per rate change."""
+    index = ConsumptionIndex()
+    for minute in range(60):
+        index.record(minute * MINUTE, (minute + 1) * MINUTE, "3", 10.0)
+
+    assert list(index.timestamps) == [0.0, 60 * MINUTE]
+    assert index.cumulative[-1] == pytest.approx(600.0)
+
+    # A new rate starts a new point, then merges again
+    for minute in range(60, 90):
+        index.record(minute * MINUTE, (minute + 1) * MINUTE, "3", 20.0)
+    assert list(index.timestamps) == [0.0, 60 * MINUTE, 90 * MINUTE]
+
+
+def test_same_rate_at_another_level_is_not_merged():
+    """Per-level curves stay exact when the level changes but the rate does not."""
+    index = ConsumptionIndex()
+    index.record(0.0, MINUTE, "2", 10.0)
+    index.record(MINUTE, 2 * MINUTE, "3", 10.0)
+
+    assert len(index) == 3
+    assert index.consumption_between(0.0, 2 * MINUTE, "2") == pytest.approx(10.0)
+    assert index.consumption_between(0.0, 2 * MINUTE, "3") == pytest.approx(10.0)
+
+
+def test_gaps_are_flat():
+    """Nothing is consumed between two separate segments."""
+    index = ConsumptionIndex()
+    index.record(0.0, MINUTE, "1", 10.0)
+    index.record(10 * MINUTE, 11 * MINUTE, "1", 10.0)
+
+    assert index.consumption_between(MINUTE, 10 * MINUTE) == 0.0
+    assert index.consumption_between(0.0, 11 * MINUTE) == pytest.approx(20.0)
+
+
+def test_range_queries_match_brute_force():
+    """Interpolated range queries match summing the recorded segments."""
+    rng = random.Random(42)
+    index = ConsumptionIndex()
+    segments = []
+    ts = 1_700_000_000.0
+    rate = 10.0
+    for _ in range(500):
+        if rng.random() < 0.2:
+            rate = rng.choice([5.0, 10.0, 20.0])
+        if rng.random() < 0.1:
+            # Stove off for a while
+            ts += rng.uniform(MINUTE, 60 * MINUTE)
+        level = {5.0: "1", 10.0: "3", 20.0: "5"}[rate]
+        segments.append((ts, ts + MINUTE, level, rate))
+        index.record(ts, ts + MINUTE, level, rate)
+        ts += MINUTE
+
+    assert len(index) < len(segments)
+    first, last = segments[0][0], segments[-1][1]
+    for _ in range(200):
+        start_ts, end_ts = sorted(rng.uniform(first - MINUTE, last + MINUTE) for _ in range(2))
+        assert index.consumption_between(start_ts, end_ts) == pytest.approx(
+            _brute_force(segments, start_ts, end_ts), abs=1e-6
+        )
+        for level in ("1", "3", "5"):
+            assert index.consumption_between(start_ts, end_ts, level) == pytest.approx(
+                _brute_force(segments, start_ts, end_ts, level), abs=1e-6
+            )
+
+
+def test_timestamps_stay_monotonic():
+    """A segment starting before the last point is moved after it."""
+    index = ConsumptionIndex()
+    index.record(0.0, 2 * MINUTE, "1", 10.0)
+    index.record(MINUTE, 3 * MINUTE, "1", 10.0)
+
+    assert list(index.timestamps) == sorted(index.timestamps)
+    assert index.cumulative[-1] == pytest.approx(20.0)
+
+
+def test_round_trip():
+    """The compact representation restores the same curve, quantized."""
+    index = ConsumptionIndex()
+    index.record(1_700_000_000.123, 1_700_000_060.456, "2", 12.3456)
+    index.record(1_700_000_120.0, 1_700_000_180.0, "4", 25.0)
+
+    restored = ConsumptionIndex.from_dict(index.as_dict())
+
+    assert list(restored.timestamps) == pytest.approx(list(index.timestamps), abs=1e-3)
+    assert list(restored.cumulative) == pytest.approx(list(index.cumulative), abs=1e-2)
+    assert set(restored.cumulative_by_level) == {"2", "4"}
+
+
+def test_inconsistent_data_is_discarded():
+    """Arrays of different lengths restore an empty index."""
+    data = {"t": [0, 60000], "g": [0], "levels": {"1": [0, 100]}}
+
+    assert len(ConsumptionIndex.from_dict(data)) == 0
+    assert len(ConsumptionIndex.from_dict(None)) == 0
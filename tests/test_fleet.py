@@ -0,0 +1,135 @@
+"""Tests for the vectorized fleet engine."""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from custom_components.pellet_tracker.fleet import INITIAL_CAPACITY, FleetEngine  # noqa: E402
+
+T0 = 1_700_000_000.0
+HOUR = 3600.0
+TANK_G = 10000.0
+
+
+def _engine(count: int, save_delay: float = 300) -> FleetEngine:
+    engine = FleetEngine(save_delay)
+    for index in range(count):
+        engine.register(f"tracker_{index}", TANK_G, 0.0, TANK_G, T0)
+    return engine
+
+
+def test_settle_applies_rate_to_active_slots():
+    """Each active slot consumes its rate over the elapsed time."""
+    engine = _engine(3)
+    engine.set_rate(0, True, 1000.0)
+    engine.set_rate(1, True, 500.0)
+    engine.set_rate(2, False, 0.0)
+
+    consumption = engine.settle(T0 + HOUR / 2)
+
+    assert consumption.tolist() == pytest.approx([500.0, 250.0, 0.0])
+    assert engine.level_g[:3].tolist() == pytest.approx([9500.0, 9750.0, TANK_G])
+    assert engine.session_g[:3].tolist() == pytest.approx([500.0, 250.0, 0.0])
+    assert engine.last_settled[:3].tolist() == [T0 + HOUR / 2] * 3
+
+
+def test_settle_clamps_level_at_zero():
+    """The level never goes negative, the session keeps counting."""
+    engine = _engine(1)
+    engine.set_rate(0, True, 2000.0)
+
+    engine.settle(T0 + 6 * HOUR)
+
+    assert engine.level_g[0] == 0
+    assert engine.session_g[0] == pytest.approx(12000.0)
+
+
+def test_settle_ignores_clock_going_backwards():
+    """Nothing is consumed and last settled time does not move back."""
+    engine = _engine(1)
+    engine.set_rate(0, True, 1000.0)
+
+    engine.settle(T0 - HOUR)
+
+    assert engine.level_g[0] == TANK_G
+    assert engine.last_settled[0] == T0
+
+
+def test_settle_slot_matches_settle():
+    """Settling one slot gives the same result as the vectorized settle."""
+    engine = _engine(2)
+    engine.set_rate(0, True, 1000.0)
+    engine.set_rate(1, True, 1000.0)
+
+    assert engine.settle_slot(0, T0 + HOUR) == pytest.approx(1000.0)
+    engine.settle(T0 + HOUR)
+
+    assert engine.level_g[0] == engine.level_g[1]
+    assert engine.pending_g[0] == engine.pending_g[1]
+    # Already settled
+    assert engine.settle_slot(0, T0 + HOUR) == 0.0
+
+
+def test_pending_segment():
+    """Pending consumption is one segment from the first settle that consumed."""
+    engine = _engine(1)
+    engine.settle(T0 + HOUR)
+    engine.set_rate(0, True, 600.0)
+    for minute in range(1, 31):
+        engine.settle(T0 + HOUR + minute * 60)
+
+    assert engine.take_pending(0) == pytest.approx((T0 + HOUR, T0 + 1.5 * HOUR, 300.0))
+    assert engine.take_pending(0)[2] == 0.0
+
+    engine.settle(T0 + 2 * HOUR)
+    assert engine.take_pending(0) == pytest.approx((T0 + 1.5 * HOUR, T0 + 2 * HOUR, 300.0))
+
+
+def test_tick_notifies_when_shown_percentage_changes():
+    """Slots are only reported when their integer percentage changes."""
+    engine = _engine(2, save_delay=HOUR)
+    # 1% of the tank every 10 minutes
+    engine.set_rate(0, True, 600.0)
+
+    notified = []
+    for minute in range(1, 21):
+        notify, save = engine.tick(T0 + minute * 60)
+        notified.extend(notify.tolist())
+        assert not len(save)
+
+    assert notified == [0, 0]
+    assert engine.shown_pct[0] == 98
+
+
+def test_tick_coalesces_saves():
+    """A save is due once per delay after consumption starts, until marked saved."""
+    engine = _engine(2, save_delay=300)
+    engine.set_rate(0, True, 10.0)
+
+    due_at = [
+        minute for minute in range(1, 13) if engine.tick(T0 + minute * 60)[1].tolist() == [0]
+    ]
+    # Consumption started at minute 1, still due until the tracker saves
+    assert due_at[:2] == [6, 7]
+
+    engine.take_pending(0)
+    engine.mark_saved(0)
+    assert not len(engine.tick(T0 + 13 * 60)[1])
+    assert engine.save_due[0] == T0 + 13 * 60 + 300
+
+
+def test_register_reuses_slots_and_grows():
+    """Freed slots are reused and arrays grow beyond the initial capacity."""
+    engine = _engine(INITIAL_CAPACITY + 1)
+    assert len(engine.level_g) == 2 * INITIAL_CAPACITY
+
+    engine.set_rate(5, True, 1000.0)
+    engine.settle(T0 + HOUR)
+    engine.unregister(5)
+    assert len(engine) == INITIAL_CAPACITY
+
+    slot = engine.register("new", 5000.0, 0.0, TANK_G, T0 + HOUR)
+    assert slot == 5
+    assert engine.trackers[slot] == "new"
+    assert not engine.active[slot]
+    assert engine.pending_g[slot] == 0
+    assert engine.shown_pct[slot] == 50
@@ -0,0 +1,104 @@
+"""Tests for the write-ahead journal."""
+from custom_components.pellet_tracker.journal import (
+    Journal,
+    RECORD_CALIBRATION,
+    RECORD_CONSUMPTION,
+    RECORD_REFILL,
+    RECORD_SET_LEVEL,
+    replay,
+)
+
+RECORDS = [
+    [1, RECORD_CONSUMPTION, 0.0, 60.0, "3", 10.0],
+    [2, RECORD_CALIBRATION, {"3": 1.1}],
+    [3, RECORD_REFILL],
+    [4, RECORD_SET_LEVEL, 5000.0],
+]
+
+
+def _collect(records, after_seq):
+    applied = []
+    last_seq = replay(records, after_seq, lambda seq, kind, payload: applied.append((seq, kind)))
+    return applied, last_seq
+
+
+def test_append_and_load(tmp_path):
+    """Records round-trip and the size tracks the file."""
+    journal = Journal(str(tmp_path / "journal"))
+    journal.append(RECORDS[:2])
+    journal.append(RECORDS[2:])
+
+    reloaded = Journal(journal.path)
+    assert reloaded.load() == RECORDS
+    assert reloaded.size == journal.size == (tmp_path / "journal").stat().st_size
+
+
+def test_load_missing_file(tmp_path):
+    """A missing journal has no records."""
+    journal = Journal(str(tmp_path / "journal"))
+    assert journal.load() == []
+    assert journal.size == 0
+
+
+def test_truncated_record_is_cut(tmp_path):
+    """A record cut short by a crash is dropped and removed from the file."""
+    path = tmp_path / "journal"
+    journal = Journal(str(path))
+    journal.append(RECORDS[:2])
+    valid_size = path.stat().st_size
+    with open(path, "ab") as journal_file:
+        journal_file.write(b'[3,"r"')
+
+    journal = Journal(str(path))
+    assert journal.load() == RECORDS[:2]
+    assert path.stat().st_size == journal.size == valid_size
+
+    # New records follow the last valid one
+    journal.append(RECORDS[2:])
+    assert Journal(str(path)).load() == RECORDS
+
+
+def test_corrupt_record_stops_load(tmp_path):
+    """Records after a corrupt line are not trusted."""
+    path = tmp_path / "journal"
+    path.write_bytes(b'[1,"r"]\nnot json\n[2,"r"]\n')
+
+    assert Journal(str(path)).load() == [[1, "r"]]
+    assert path.read_bytes() == b'[1,"r"]\n'
+
+
+def test_clear(tmp_path):
+    """Clearing removes the file."""
+    journal = Journal(str(tmp_path / "journal"))
+    journal.append(RECORDS)
+    journal.clear()
+    journal.clear()
+
+    assert not (tmp_path / "journal").exists()
+    assert journal.size == 0
+
+
+def test_replay_skips_records_covered_by_snapshot():
+    """Only records after the given sequence number are applied."""
+    applied, last_seq = _collect(RECORDS, 2)
+
+    assert applied == [(3, RECORD_REFILL), (4, RECORD_SET_LEVEL)]
+    assert last_seq == 4
+
+
+def test_replay_nothing_new():
+    """The given sequence number is returned when nothing is applied."""
+    assert _collect(RECORDS, 4) == ([], 4)
+    assert _collect([], 7) == ([], 7)
+
+
+def test_replay_stops_at_invalid_record():
+    """Replay stops at unknown, out of order or rejected records."""
+    assert _collect([*RECORDS[:2], [3, "x"], RECORDS[3]], 0) == ([(1, "c"), (2, "k")], 2)
+    assert _collect([RECORDS[0], RECORDS[0]], 0) == ([(1, "c")], 1)
+    assert _collect([["1", "r"]], 0) == ([], 0)
+
+    def apply(seq, kind, payload):
+        start_ts, end_ts, power, consumption = payload
+
+    assert replay([[1, RECORD_CONSUMPTION, 0.0], RECORDS[1]], 0, apply) == 0
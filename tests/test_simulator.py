@@ -0,0 +1,157 @@
+"""Tests for the what-if simulator."""
+import pytest
+
+from custom_components.pellet_tracker.const import (
+    CONF_ACTIVE_STATUSES,
+    CONF_MAX_RATE,
+    CONF_POWER_LEVELS,
+    CONF_TANK_SIZE,
+)
+from custom_components.pellet_tracker.model import (
+    calibrate_factors,
+    clamp_error_ratio,
+    refill_calibration_target,
+)
+from custom_components.pellet_tracker.simulator import (
+    EVENT_POWER,
+    EVENT_REFILL,
+    EVENT_STATUS,
+    SimulationPool,
+    simulate_candidate,
+)
+
+HOUR = 3600.0
+
+CONFIG = {
+    CONF_TANK_SIZE: 10,
+    CONF_MAX_RATE: 1.0,
+    CONF_POWER_LEVELS: ["1", "2", "3", "4", "5"],
+    CONF_ACTIVE_STATUSES: ["on"],
+}
+
+
+def _timeline(hours_at_full_power: float) -> list:
+    """Refill, burn at power 5 (1 kg/h) for the given hours, then refill."""
+    return [
+        (0.0, EVENT_REFILL, None),
+        (0.0, EVENT_STATUS, "on"),
+        (0.0, EVENT_POWER, "5.0"),
+        (hours_at_full_power * HOUR, EVENT_STATUS, "off"),
+        (hours_at_full_power * HOUR + 1, EVENT_REFILL, None),
+    ]
+
+
+def test_refill_calibration_target():
+    """Only nearly empty refills with consumption calibrate."""
+    assert refill_calibration_target(500, 10000, 9500) == 10000
+    assert refill_calibration_target(1000, 10000, 9000) is None
+    assert refill_calibration_target(0, 10000, 0) is None
+
+
+def test_consumption_and_refill():
+    """Consumption follows the interpolated rate and refills reset the tank."""
+    result = simulate_candidate(CONFIG, _timeline(9.5), 0.0, 10 * HOUR)
+
+    assert result["refill_count"] == 1
+    assert result["projected_refills"] == pytest.approx(0.95)
+    assert result["mean_level_at_refill_pct"] == pytest.approx(5.0)
+    assert result["final_level_kg"] == 10
+    assert result["empty_events"] == 0
+    # 9.5 kg estimated against a 10 kg tank
+    assert result["calibrations"] == 1
+    assert result["mean_calibration_error"] == pytest.approx(10 / 9.5 - 1, abs=1e-4)
+
+
+def test_calibration_matches_tracker_model():
+    """The simulator applies the same EWMA update as the tracker."""
+    result = simulate_candidate(CONFIG, _timeline(9.5), 0.0, 10 * HOUR)
+
+    expected = calibrate_factors({}, {"5": 9500.0}, 9500.0, clamp_error_ratio(10000, 9500))
+    assert result["final_correction_factors"]["5"] == pytest.approx(expected["5"], abs=1e-4)
+
+
+def test_starts_from_learned_factors():
+    """Learned correction factors are used from the start of the replay."""
+    result = simulate_candidate(CONFIG, _timeline(5), 0.0, 10 * HOUR, {"5": 1.8})
+
+    # 5 h at 1.8 kg/h leaves 1 kg, too much left to calibrate
+    assert result["mean_level_at_refill_pct"] == pytest.approx(10.0)
+    assert result["calibrations"] == 0
+    assert result["final_correction_factors"] == {"5": 1.8}
+
+
+def test_replay_starts_at_first_refill():
+    """Consumption before the first refill is ignored, the tank level is unknown then."""
+    timeline = [
+        (0.0, EVENT_STATUS, "on"),
+        (0.0, EVENT_POWER, "5"),
+        # The real tank was nearly empty at this point
+        (3 * HOUR, EVENT_REFILL, None),
+        (12.5 * HOUR, EVENT_STATUS, "off"),
+        (12.5 * HOUR + 1, EVENT_REFILL, None),
+    ]
+
+    result = simulate_candidate(CONFIG, timeline, 0.0, 13 * HOUR)
+
+    assert result["replayed_hours"] == 10
+    assert result["refill_count"] == 1
+    assert result["projected_refills"] == pytest.approx(0.95)
+    assert result["mean_level_at_refill_pct"] == pytest.approx(5.0)
+    assert result["calibrations"] == 1
+
+
+def test_no_refill_in_window():
+    """Without a refill there is no known level to replay from."""
+    timeline = _timeline(5)[1:-1]
+
+    result = simulate_candidate(CONFIG, timeline, 0.0, 10 * HOUR)
+
+    assert result["replayed_hours"] == 0
+    assert result["projected_refills"] == 0
+    assert result["mean_refill_interval_h"] is None
+    assert result["final_level_kg"] is None
+    assert result["empty_events"] == 0
+
+
+def test_empty_events():
+    """Running past an empty tank is counted and the level clamps at 0."""
+    result = simulate_candidate(CONFIG, _timeline(12), 0.0, 13 * HOUR)
+
+    assert result["empty_events"] == 1
+    assert result["mean_level_at_refill_pct"] == 0
+    assert result["projected_refills"] == pytest.approx(1.2)
+
+
+def test_pool_ranks_results():
+    """Results are ranked by calibration error, best first."""
+    configs = [
+        {**CONFIG, "name": "current"},
+        {**CONFIG, CONF_MAX_RATE: 1.05, "name": "closer"},
+    ]
+    pool = SimulationPool(max_workers=1)
+    try:
+        results = pool.run(configs, _timeline(9.5), 0.0, 10 * HOUR)
+    finally:
+        pool.shutdown()
+
+    assert [result["name"] for result in results] == ["closer", "current"]
+    assert [result["rank"] for result in results] == [1, 2]
+
+
+def test_pool_reuses_workers():
+    """Worker processes are started once and reused across runs."""
+    # Spawned workers import the integration package
+    pytest.importorskip("homeassistant")
+
+    configs = [{**CONFIG, CONF_MAX_RATE: rate, "name": str(rate)} for rate in (0.9, 1.0, 1.1)]
+    pool = SimulationPool(max_workers=2)
+    try:
+        first = pool.run(configs, _timeline(9.5), 0.0, 10 * HOUR)
+        executor = pool._pool
+        second = pool.run(configs, _timeline(9.5), 0.0, 10 * HOUR)
+        assert pool._pool is executor
+    finally:
+        pool.shutdown()
+
+    assert first == second
+    assert pool._pool is None